@@ -1,6 +1,17 @@
 import os
+import re
+import json
+import time
+import random
+import hashlib
 import asyncio
-from typing import AsyncGenerator, Annotated, TypedDict, List
+import unicodedata
+import importlib.util
+from collections import OrderedDict
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import parse_qs, urlparse
+from typing import TYPE_CHECKING, AsyncGenerator, Annotated, TypedDict, List
 
 # --- A2A and Agent Stack Imports ---
 from a2a.types import AgentSkill, Message
@@ -10,109 +21,499 @@ from agentstack_sdk.server.context import RunContext
 from agentstack_sdk.a2a.types import AgentMessage
 from agentstack_sdk.a2a.extensions import AgentDetail, AgentDetailTool
 
-# --- LangGraph & LangChain Imports ---
-from langgraph.graph import StateGraph, END
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
-from langchain_ollama import ChatOllama
+# --- HTTP Client Import ---
+# LangGraph, LangChain and sentence-transformers are imported lazily on first use
+# (see get_llm, get_app and SemanticCache) so the server starts accepting connections sooner
+import httpx
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # --- 1. State Definition ---
-class AgentState(TypedDict):
+class InputState(TypedDict):
     query: str
+
+class AgentState(InputState):
+    country: str
     trends: List[str]
-    context_reports: List[str]
     final_report: str
 
 # --- 2. Node Definitions (Agent Logic) ---
 
-# Search tool and local LLM with Ollama
-search_wrapper = DuckDuckGoSearchAPIWrapper()
-# Using the requested granite4 model
-llm = ChatOllama(model="granite4:tiny-h") 
+# Local LLM with Ollama
+# Defaults to the granite4 model; the Ollama library tag is a 4-bit (Q4_K_M) quantization
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "granite4:tiny-h")
+# The context is sized to fit the largest prompt (~1.3k tokens for the report) plus num_predict
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+OLLAMA_NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT", "1024"))
+
+@lru_cache(maxsize=2)
+def get_llm(json_mode: bool = False):
+    """Create the Ollama chat model on first use; temperature 0 keeps outputs deterministic so they can be cached.
+
+    With json_mode, Ollama constrains decoding to valid JSON, so the model emits no filler around the answer.
+    """
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model=OLLAMA_MODEL,
+        temperature=0,
+        num_ctx=OLLAMA_NUM_CTX,
+        num_predict=OLLAMA_NUM_PREDICT,
+        format="json" if json_mode else None,
+    )
+
+# Fixed system prompts: only the human message varies between calls, so Ollama can reuse
+# the KV cache of this identical prefix instead of re-processing the instructions every time
+SYSTEM_EXTRACT = (
+    "You identify X trends. Identify if a specific country is mentioned in the user query, and based on the "
+    "search results for the given trends24.in page, extract EXACTLY the TOP 5 trending topics for today. "
+    'Return ONLY a JSON object of the form {"country": "...", "trends": ["...", "..."]}, where country '
+    "is the country name in English (lowercase), or 'global' if no country is specified."
+)
+SYSTEM_REPORT = (
+    "You are an insightful X trends analyst. Write a single, coherent, and friendly report about the trends "
+    "you are given. Use emojis (💡, 📰, 🚀, etc.) to make it engaging. "
+    "For each trend, briefly explain why it is trending using its search results, followed by "
+    "[Source: URL] with at least one source URL from those results. "
+    "Greet the user as a friend. Format the report in Markdown."
+)
+
+# Cap concurrent generations to what the local Ollama server actually runs in parallel
+# (match OLLAMA_NUM_PARALLEL on the Ollama side), so extra requests queue here instead of thrashing it
+LLM_SEM = asyncio.Semaphore(int(os.getenv("OLLAMA_PARALLEL", "2")))
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[object, tuple[float, object]] = OrderedDict()
+
+    def get(self, key, default=None):
+        hit = self._entries.get(key)
+        if hit is None or hit[0] <= time.monotonic():
+            return default
+        self._entries.move_to_end(key)
+        return hit[1]
+
+    def set(self, key, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+# Exact-match cache of LLM responses: sha256(model, JSON mode, prompt) -> content
+llm_cache = TTLCache(maxsize=1024, ttl=3600)
+
+async def cached_invoke(system: str, prompt: str, json_mode: bool = False) -> str:
+    """Invoke the LLM with a system and a human message, reusing the response of an identical recent call"""
+    key = hashlib.sha256(f"{OLLAMA_MODEL}|{json_mode}|{system}|{prompt}".encode()).hexdigest()
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    async with LLM_SEM:
+        res = await get_llm(json_mode).ainvoke([SystemMessage(content=system), HumanMessage(content=prompt)])
+    llm_cache.set(key, res.content)
+    return res.content
+
+# Search tool: one pooled async HTTP/2 client shared by every DuckDuckGo search
+DDG_URL = "https://html.duckduckgo.com/html/"
+search_client = httpx.AsyncClient(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=20),
+    headers={"User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"},
+)
+
+class DuckDuckGoResultsParser(HTMLParser):
+    """Collect title, link and snippet of each result on a DuckDuckGo HTML results page"""
+
+    def __init__(self):
+        super().__init__()
+        self.results: list[dict] = []
+        self._field: str | None = None
+        self._in_ad = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if "result__a" in classes:
+            href = attrs.get("href") or ""
+            # Sponsored results go through DuckDuckGo's ad redirect
+            self._in_ad = "duckduckgo.com/y.js" in href
+            if self._in_ad:
+                return
+            # Organic links are wrapped in a redirect carrying the target in "uddg"
+            link = parse_qs(urlparse(href).query).get("uddg", [href])[0]
+            self.results.append({"title": "", "link": link, "snippet": ""})
+            self._field = "title"
+        elif "result__snippet" in classes and self.results and not self._in_ad:
+            self._field = "snippet"
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._field = None
+
+    def handle_data(self, data):
+        if self._field:
+            self.results[-1][self._field] += data
+
+# Identical searches (e.g. the same country's trends page) repeat across users within minutes
+search_cache = TTLCache(maxsize=512, ttl=600)
+
+class RateLimiter:
+    """Async token bucket allowing `rate` acquisitions per `period` seconds"""
+
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+# DuckDuckGo answers bursts with 429/403, so pace requests to the host and back off when throttled
+ddg_limiter = RateLimiter(rate=5, period=1.0)
+DDG_MAX_ATTEMPTS = 3
+DDG_THROTTLE_STATUSES = (403, 429)
+
+async def web_search(query: str, max_results: int) -> list[dict]:
+    """Search DuckDuckGo and return up to max_results dicts with title, link and snippet"""
+    cached = search_cache.get((query, max_results))
+    if cached is not None:
+        return cached
+
+    for attempt in range(DDG_MAX_ATTEMPTS):
+        await ddg_limiter.acquire()
+        try:
+            response = await search_client.post(DDG_URL, data={"q": query})
+            if response.status_code in DDG_THROTTLE_STATUSES:
+                response.raise_for_status()
+            break
+        except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+            # Throttling, timeouts and dropped connections are usually transient
+            if attempt == DDG_MAX_ATTEMPTS - 1:
+                raise
+            reason = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else type(exc).__name__
+            delay = 2 ** attempt + random.random()
+            print(f"--- [LangGraph] DuckDuckGo search failed ({reason}), retrying in {delay:.1f}s ---")
+            await asyncio.sleep(delay)
+    response.raise_for_status()
+    parser = DuckDuckGoResultsParser()
+    parser.feed(response.text)
+    results = [{key: value.strip() for key, value in r.items()} for r in parser.results[:max_results]]
+    # Throttled requests can get a 2xx anomaly page with no results; don't pin that for every user
+    if results:
+        search_cache.set((query, max_results), results)
+    return results
+
+# Countries with a dedicated trends24.in page, mapped to their URL slug
+COUNTRY_SLUGS = {
+    "algeria": "algeria", "argentina": "argentina", "australia": "australia", "austria": "austria",
+    "bahrain": "bahrain", "belarus": "belarus", "belgium": "belgium", "brazil": "brazil",
+    "canada": "canada", "chile": "chile", "colombia": "colombia", "denmark": "denmark",
+    "dominican republic": "dominican-republic", "ecuador": "ecuador", "egypt": "egypt", "france": "france",
+    "germany": "germany", "ghana": "ghana", "greece": "greece", "guatemala": "guatemala",
+    "india": "india", "indonesia": "indonesia", "ireland": "ireland", "israel": "israel",
+    "italy": "italy", "japan": "japan", "jordan": "jordan", "kenya": "kenya",
+    "korea": "korea", "kuwait": "kuwait", "latvia": "latvia", "lebanon": "lebanon",
+    "malaysia": "malaysia", "mexico": "mexico", "netherlands": "netherlands", "new zealand": "new-zealand",
+    "nigeria": "nigeria", "norway": "norway", "oman": "oman", "pakistan": "pakistan",
+    "panama": "panama", "peru": "peru", "philippines": "philippines", "poland": "poland",
+    "portugal": "portugal", "puerto rico": "puerto-rico", "qatar": "qatar", "russia": "russia",
+    "saudi arabia": "saudi-arabia", "singapore": "singapore", "south africa": "south-africa", "spain": "spain",
+    "sweden": "sweden", "switzerland": "switzerland", "thailand": "thailand", "turkey": "turkey",
+    "ukraine": "ukraine", "united arab emirates": "united-arab-emirates", "united kingdom": "united-kingdom",
+    "united states": "united-states", "venezuela": "venezuela", "vietnam": "vietnam",
+}
+
+# Extra English and Spanish names users refer to the same countries by (written without accents)
+COUNTRY_ALIASES = {
+    **COUNTRY_SLUGS,
+    "us": "united-states", "usa": "united-states", "america": "united-states",
+    "united states of america": "united-states", "estados unidos": "united-states",
+    "estados unidos de america": "united-states", "eeuu": "united-states",
+    "uk": "united-kingdom", "britain": "united-kingdom", "great britain": "united-kingdom", "england": "united-kingdom",
+    "reino unido": "united-kingdom", "inglaterra": "united-kingdom",
+    "uae": "united-arab-emirates", "emiratos arabes unidos": "united-arab-emirates",
+    "south korea": "korea", "corea": "korea", "corea del sur": "korea",
+    "holland": "netherlands", "holanda": "netherlands", "paises bajos": "netherlands",
+    "argelia": "algeria", "barein": "bahrain", "bielorrusia": "belarus", "belgica": "belgium", "brasil": "brazil",
+    "dinamarca": "denmark", "republica dominicana": "dominican-republic", "egipto": "egypt",
+    "francia": "france", "alemania": "germany", "grecia": "greece", "irlanda": "ireland", "italia": "italy",
+    "japon": "japan", "jordania": "jordan", "kenia": "kenya", "letonia": "latvia", "libano": "lebanon",
+    "malasia": "malaysia", "nueva zelanda": "new-zealand", "noruega": "norway",
+    "filipinas": "philippines", "polonia": "poland", "catar": "qatar", "rusia": "russia",
+    "arabia saudita": "saudi-arabia", "arabia saudi": "saudi-arabia", "singapur": "singapore",
+    "sudafrica": "south-africa", "espana": "spain", "suecia": "sweden", "suiza": "switzerland",
+    "tailandia": "thailand", "turquia": "turkey", "ucrania": "ukraine",
+}
+
+# Aliases that are ordinary words in running text ("tell us", Spanish "usa", "Latin America");
+# they still normalize LLM answers but are matched by US_RE instead of the case-insensitive regex
+AMBIGUOUS_ALIASES = {"us", "usa", "america"}
+
+# Longest names first so "south korea" wins over "korea" and "united states" isn't cut short
+COUNTRY_RE = re.compile(
+    r"\b("
+    + "|".join(
+        re.escape(name)
+        for name in sorted(COUNTRY_ALIASES, key=len, reverse=True)
+        if name not in AMBIGUOUS_ALIASES
+    )
+    + r")\b",
+    re.IGNORECASE,
+)
+
+# Case-sensitive: "US", "U.S.", "USA", "U.S.A." and "America" on its own, but not "us" or "Latin America"
+US_RE = re.compile(
+    r"\bU\.?S\.?(?:A\.?)?(?!\w)"
+    r"|(?<![Ll]atin )(?<![Ss]outh )(?<![Nn]orth )(?<![Cc]entral )\b[Aa]merica\b"
+)
+
+def strip_accents(text: str) -> str:
+    """Drop diacritics so "México" and "Mexico" match the same alias"""
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def detect_country(query: str) -> str | None:
+    """Cheap lexical pass: return the trends24.in slug of a country named in the query, if any"""
+    query = strip_accents(query)
+    match = COUNTRY_RE.search(query)
+    us_match = US_RE.search(query)
+    # Prefer whichever country is named first
+    if us_match and (match is None or us_match.start() < match.start()):
+        return "united-states"
+    return COUNTRY_ALIASES[match.group(1).lower()] if match else None
+
+def normalize_country(country: str | None) -> str:
+    """Turn a free-form country name from the LLM into a trends24.in slug"""
+    country = strip_accents(country or "global").strip().lower().replace("'", "").replace('"', "")
+    if country in ("", "none", "global"):
+        return "global"
+    return COUNTRY_ALIASES.get(country, country.replace(" ", "-"))
+
+def trends_url(country: str) -> str:
+    """Build the trends24.in URL for a country slug"""
+    base_url = "https://trends24.in/"
+    return f"{base_url}{country}/" if country != "global" else base_url
+
+def trends_search_query(country: str) -> str:
+    """Build the DuckDuckGo query used to find the trends24.in page for a country"""
+    return f"site:trends24.in top trending topics {country.replace('-', ' ') if country != 'global' else ''}".strip()
+
+def parse_json_object(content: str) -> dict:
+    """Parse a JSON object returned by the LLM, tolerating malformed output"""
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+async def extract_country_and_trends(query: str, url: str, results: list[dict]) -> dict:
+    """Single structured LLM call returning the queried country and the top 5 trends"""
+    results_text = "\n".join([r.get('snippet', '') for r in results])
+    extract_prompt = f"Query: {query}\nPage: {url}\nResults:\n{results_text}"
+    extracted = parse_json_object(await cached_invoke(SYSTEM_EXTRACT, extract_prompt, json_mode=True))
+    trends = extracted.get("trends")
+    if not isinstance(trends, list):
+        trends = []
+    return {
+        "country": normalize_country(extracted.get("country")),
+        "trends": [str(t).strip() for t in trends if str(t).strip()][:5],
+    }
 
 async def analyze_and_get_trends(state: AgentState):
     """Step 1, 2, and 3: Identify country, build URL, and extract top 5 from trends24.in"""
     query = state['query']
     
-    # 1. Analyze if a country is mentioned
-    country_prompt = (
-        "Identify if a specific country is mentioned in the following user query. "
-        "Return only the country name in English (lowercase), or 'global' if no country is specified. "
-        "Return ONLY the word, no explanation. "
-        "Query: " + query
-    )
-    country_res = await llm.ainvoke(country_prompt)
-    country = country_res.content.strip().lower().replace("'", "").replace('"', "")
+    # 1. Analyze if a country is mentioned; the LLM only decides when the lexical pass finds nothing
+    country = detect_country(query) or "global"
     
     # 2. Build the trends24.in URL
-    base_url = "https://trends24.in/"
-    url = f"{base_url}{country}/" if country != "global" else base_url
+    url = trends_url(country)
     
     print(f"--- [LangGraph] Searching for trends in country: {country} at {url} ---")
     
     # 3. Get the top 5 trends
-    search_query = f"site:trends24.in top trending topics {country if country != 'global' else ''}"
-    results = search_wrapper.results(search_query, max_results=5)
+    results = await web_search(trends_search_query(country), 5)
+    extracted = await extract_country_and_trends(query, url, results)
     
-    results_text = "\n".join([r.get('snippet', '') for r in results])
-    extract_prompt = (
-        f"Based on these search results for {url}, extract EXACTLY the TOP 5 trending topics for today. "
-        "Return them as a comma-separated list, nothing else. "
-        f"Results:\n{results_text}"
-    )
-    trends_res = await llm.ainvoke(extract_prompt)
-    trends = [t.strip() for t in trends_res.content.split(",") if t.strip()]
+    if country == "global" and extracted["country"] != "global":
+        # The LLM spotted a country the lexical pass missed, so redo the search for it
+        country = extracted["country"]
+        url = trends_url(country)
+        print(f"--- [LangGraph] Searching for trends in country: {country} at {url} ---")
+        results = await web_search(trends_search_query(country), 5)
+        extracted = await extract_country_and_trends(query, url, results)
     
-    return {"trends": trends[:5]}
-
-async def research_trends_context(state: AgentState):
-    """Step 4: Search for the 'why' of each trend and capture the source URL"""
-    reports = []
-    for trend in state['trends']:
-        print(f"--- [LangGraph] Investigating context for: {trend} ---")
-        context_query = f"why is {trend} trending news today source article"
-        search_results = search_wrapper.results(context_query, max_results=3)
-        
-        context_prompt = (
-            f"Explain briefly why '{trend}' is trending. Use the search results below. "
-            "You MUST include at least one source URL from the results. "
-            "Format: Friendly explanation followed by [Source: URL]\n\n"
-            f"Search Results:\n{search_results}"
-        )
-        context_res = await llm.ainvoke(context_prompt)
-        reports.append(context_res.content.strip())
-        
-    return {"context_reports": reports}
-
-async def synthesize_report(state: AgentState):
-    """Step 5: Generate the final friendly, dynamic report with emojis"""
-    reports_text = "\n\n".join(state['context_reports'])
+    return {"country": country, "trends": extracted["trends"]}
+
+async def search_trend_context(trend: str) -> list[dict]:
+    """Search for news explaining why a trend is trending"""
+    print(f"--- [LangGraph] Investigating context for: {trend} ---")
+    context_query = f"why is {trend} trending news today source article"
+    try:
+        return await web_search(context_query, 3)
+    except httpx.HTTPError as exc:
+        # One failed search shouldn't cost the user the whole report
+        print(f"--- [LangGraph] Context search failed for {trend}: {exc!r} ---")
+        return []
+
+async def research_and_report(state: AgentState):
+    """Step 4 and 5: Search for the 'why' of each trend and write the final friendly report with emojis"""
+    trends = state['trends']
+    # Trends are independent of each other, so search for them concurrently
+    search_results = await asyncio.gather(*[search_trend_context(trend) for trend in trends])
     
-    final_prompt = (
-        "Synthesize the following trend analysis into a single, coherent, and friendly report. "
-        "You are an insightful X trends analyst. Use emojis (💡, 📰, 🚀, etc.) to make it engaging. "
-        "Ensure each of the 5 trends has its explanation and MUST include the source URL. "
-        "Greet the user as a friend.\n\n"
-        f"Context Reports:\n{reports_text}"
+    # A single call explains every trend and writes the report, so no separate synthesis pass is needed
+    final_prompt = "\n\n".join(
+        f"Trend {i}: {trend}\nSearch Results:\n{results}"
+        for i, (trend, results) in enumerate(zip(trends, search_results), start=1)
     )
-    final_res = await llm.ainvoke(final_prompt)
-    return {"final_report": final_res.content.strip()}
+    final_res = await cached_invoke(SYSTEM_REPORT, final_prompt)
+    return {"final_report": final_res.strip()}
 
 # --- 3. Graph Construction ---
 
-workflow = StateGraph(AgentState)
+@lru_cache(maxsize=1)
+def get_app():
+    """Build and compile the workflow on first use"""
+    from langgraph.graph import StateGraph, END
+
+    # Callers only provide the query; the nodes fill in the rest of the state
+    workflow = StateGraph(AgentState, input_schema=InputState)
+
+    workflow.add_node("get_trends", analyze_and_get_trends)
+    workflow.add_node("report", research_and_report)
 
-workflow.add_node("get_trends", analyze_and_get_trends)
-workflow.add_node("research_context", research_trends_context)
-workflow.add_node("synthesize", synthesize_report)
+    workflow.set_entry_point("get_trends")
+    workflow.add_edge("get_trends", "report")
+    workflow.add_edge("report", END)
 
-workflow.set_entry_point("get_trends")
-workflow.add_edge("get_trends", "research_context")
-workflow.add_edge("research_context", "synthesize")
-workflow.add_edge("synthesize", END)
+    return workflow.compile()
 
-app = workflow.compile()
+# --- 4. Semantic Report Cache ---
 
-# --- 4. Agent Stack Configuration ---
+class SemanticCache:
+    """LRU cache of final reports, matched by query embedding similarity.
+
+    Entries are scoped to the lexically detected country and the current hour,
+    since trends go stale quickly and similar phrasings about different countries
+    must never share a report. Queries without a lexical country match bypass
+    the cache, as their country is only known once the graph has run.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.87, maxsize: int = 256):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.enabled = importlib.util.find_spec("sentence_transformers") is not None
+        self._model = None
+        self._entries: OrderedDict[tuple[str, int, str], tuple["np.ndarray", str]] = OrderedDict()
+        self._use_faiss = importlib.util.find_spec("faiss") is not None
+        self._indexes: dict[tuple[str, int], tuple[object, list[tuple[str, int, str]]]] = {}
+
+    @staticmethod
+    def _scope(query: str) -> tuple[str, int] | None:
+        country = detect_country(query)
+        return (country, int(time.time() // 3600)) if country else None
+
+    def _encode(self, query: str) -> "np.ndarray":
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(query, normalize_embeddings=True)
+
+    async def embed(self, query: str) -> "np.ndarray | None":
+        """Embed the query off the event loop, or return None when caching is disabled"""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._encode, query)
+
+    def _index(self, scope: tuple[str, int]):
+        """Return (index, keys) for a scope, rebuilding the similarity index after it changed.
+
+        Uses a SIMD FAISS inner-product index when faiss is installed, else a plain numpy matrix.
+        """
+        if scope not in self._indexes:
+            import numpy as np
+
+            keys = [key for key in self._entries if key[:2] == scope]
+            matrix = np.stack([self._entries[key][0] for key in keys]).astype(np.float32)
+            if self._use_faiss:
+                import faiss
+
+                index = faiss.IndexFlatIP(matrix.shape[1])
+                index.add(matrix)
+            else:
+                index = matrix
+            self._indexes[scope] = (index, keys)
+        return self._indexes[scope]
+
+    def _search(self, index, embedding: "np.ndarray") -> tuple[float, int]:
+        """Best inner-product score and its row in the index"""
+        import numpy as np
+
+        embedding = np.asarray(embedding, dtype=np.float32)
+        if self._use_faiss:
+            scores, rows = index.search(embedding.reshape(1, -1), 1)
+            return float(scores[0, 0]), int(rows[0, 0])
+        sims = index @ embedding
+        best = int(sims.argmax())
+        return float(sims[best]), best
+
+    def lookup(self, query: str, embedding: "np.ndarray | None") -> str | None:
+        """Return the cached report for the most similar query in scope, if close enough"""
+        if embedding is None:
+            return None
+        scope = self._scope(query)
+        if scope is None or not any(key[:2] == scope for key in self._entries):
+            return None
+        index, keys = self._index(scope)
+        score, row = self._search(index, embedding)
+        if score < self.threshold:
+            return None
+        self._entries.move_to_end(keys[row])
+        return self._entries[keys[row]][1]
+
+    def store(self, query: str, embedding: "np.ndarray | None", report: str, country: str) -> None:
+        """Cache a report built for `country`, dropping entries from past hours and the least recently used ones"""
+        if embedding is None:
+            return
+        scope = self._scope(query)
+        # Only cache under the country the graph actually resolved
+        if scope is None or scope[0] != country:
+            return
+        for key in [key for key in self._entries if key[1] != scope[1]]:
+            del self._entries[key]
+        self._entries[(*scope, query)] = (embedding, report)
+        self._entries.move_to_end((*scope, query))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        # Stores are rare next to lookups, so indexes are simply rebuilt on the next lookup
+        self._indexes.clear()
+
+semantic_cache = SemanticCache()
+
+# --- 5. Agent Stack Configuration ---
 
 AGENT_DETAIL = AgentDetail(
     interaction_mode="multi-turn",
@@ -138,18 +539,51 @@ AGENT_SKILLS = [
 
 server = Server()
 
-# --- 5. Server Handler ---
+# --- 6. Server Handler ---
+
+# Progress messages sent to the user when each graph node starts
+PROGRESS_LABELS = {
+    "get_trends": "🔎 Detecting the country and fetching the top 5 trends…\n\n",
+    "report": "🧠 Researching each trend and writing your report…\n\n",
+}
 
 @server.agent(name="X Trends Agent LangGraph", detail=AGENT_DETAIL, skills=AGENT_SKILLS)
 async def langgraph_trends_agent(input: Message, context: RunContext) -> AsyncGenerator[AgentMessage, None]:
     user_query = get_message_text(input)
     print(f"--- [LangGraph] Receiving query: '{user_query}' ---")
 
-    # Execute the graph
-    initial_state = {"query": user_query, "trends": [], "context_reports": [], "final_report": ""}
-    result = await app.ainvoke(initial_state)
+    # Serve a recent report for an equivalent query without re-running the pipeline
+    embedding = await semantic_cache.embed(user_query)
+    cached_report = semantic_cache.lookup(user_query, embedding)
+    if cached_report is not None:
+        print("--- [LangGraph] Semantic cache hit ---")
+        yield AgentMessage(text=cached_report)
+        return
+
+    # Execute the graph, reporting progress per node and forwarding the report tokens as they are generated
+    final_report = ""
+    country = None
+    trends = []
+    streamed = False
+    async for event in get_app().astream_events({"query": user_query}, version="v2"):
+        node = event.get("metadata", {}).get("langgraph_node")
+        if event["event"] == "on_chain_start" and event["name"] == node and node in PROGRESS_LABELS:
+            yield AgentMessage(text=PROGRESS_LABELS[node])
+        elif event["event"] == "on_chat_model_stream" and node == "report" and event["data"]["chunk"].content:
+            streamed = True
+            yield AgentMessage(text=event["data"]["chunk"].content)
+        elif event["event"] == "on_chain_end" and event["name"] == "get_trends" and node == "get_trends":
+            country = event["data"]["output"]["country"]
+            trends = event["data"]["output"]["trends"]
+        elif event["event"] == "on_chain_end" and event["name"] == "report" and node == "report":
+            final_report = event["data"]["output"]["final_report"]
+    # A report built without any trends isn't worth serving to anyone else
+    if trends:
+        semantic_cache.store(user_query, embedding, final_report, country)
 
-    yield AgentMessage(text=result["final_report"])
+    # Nothing was streamed when the report came from the LLM response cache
+    if not streamed:
+        yield AgentMessage(text=final_report)
 
 def run():
     print("Starting Ollama-based X Trends Agent server...")